@@ -14,7 +14,7 @@ import traceback
 
 # Configure logging to stderr
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s",
     handlers=[logging.StreamHandler(sys.stderr)],
 )
@@ -42,21 +42,28 @@ def main():
     log_to_stderr(f"Current directory: {os.getcwd()}")
     log_to_stderr(f"Python path: {sys.path}")
 
-    # Check if Cinema 4D socket is available
+    # Cinema 4D socket location
     c4d_host = os.environ.get("C4D_HOST", "127.0.0.1")
     c4d_port = int(os.environ.get("C4D_PORT", 5555))
 
-    log_to_stderr(f"Checking connection to Cinema 4D on {c4d_host}:{c4d_port}")
-    try:
-        test_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        test_socket.settimeout(5)  # Set 5 second timeout
-        test_socket.connect((c4d_host, c4d_port))
-        test_socket.close()
-        log_to_stderr("✅ Successfully connected to Cinema 4D socket!")
-    except Exception as e:
-        log_to_stderr(f"❌ Could not connect to Cinema 4D socket: {e}")
+    # The pre-flight probe costs an extra TCP handshake (and an accept on the
+    # plugin side) per startup, so it only runs when C4D_MCP_PROBE is set.
+    if os.environ.get("C4D_MCP_PROBE"):
+        log_to_stderr(f"Checking connection to Cinema 4D on {c4d_host}:{c4d_port}")
+        try:
+            test_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            test_socket.settimeout(5)  # Set 5 second timeout
+            test_socket.connect((c4d_host, c4d_port))
+            test_socket.close()
+            log_to_stderr("✅ Successfully connected to Cinema 4D socket!")
+        except Exception as e:
+            log_to_stderr(f"❌ Could not connect to Cinema 4D socket: {e}")
+            log_to_stderr(
+                "   The server will still start, but Cinema 4D integration won't work!"
+            )
+    else:
         log_to_stderr(
-            "   The server will still start, but Cinema 4D integration won't work!"
+            f"Using Cinema 4D at {c4d_host}:{c4d_port} (set C4D_MCP_PROBE=1 to check on startup)"
         )
 
     try:
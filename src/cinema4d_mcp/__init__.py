@@ -1,13 +1,26 @@
 """Cinema 4D MCP Server - Connect Claude to Cinema 4D"""
 
+import importlib
+
 __version__ = "0.1.0"
 
-from . import server
+__all__ = ["main", "main_wrapper", "server"]
+
+
+def __getattr__(name):
+    # Importing server pulls in FastMCP and its dependencies; only pay for
+    # that when the server is actually used.
+    if name == "server":
+        return importlib.import_module(f"{__name__}.server")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def main():
     """Main entry point for the package."""
-    server.mcp_app.run()
+    from . import server
+
+    server.mcp.run()
 
 def main_wrapper():
     """Entry point for the wrapper script."""
-    main()
\ No newline at end of file
+    main()
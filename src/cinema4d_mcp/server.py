@@ -4,160 +4,499 @@ import socket
 import json
 import os
 import math
-import time
-from dataclasses import dataclass
+import asyncio
+import logging
+from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional, Union
+from collections import ChainMap
 from contextlib import asynccontextmanager
+from string import Template
 
 from mcp.server.fastmcp import FastMCP, Context
-from starlette.routing import Route
-from starlette.responses import JSONResponse
 
 from .config import C4D_HOST, C4D_PORT
 from .utils import logger, check_c4d_connection
 
+try:
+    import orjson
+except ImportError:  # Optional speedup; the stdlib json module is used instead
+    orjson = None
+
+
+if orjson is not None:
+
+    def _encode_frame(command: Dict[str, Any]) -> bytes:
+        """Serialize a command as one newline-terminated frame."""
+        return orjson.dumps(command, option=orjson.OPT_APPEND_NEWLINE)
+
+    def _loads_frame(buf: bytearray, end: int) -> Any:
+        # orjson reads straight from a memoryview, so the frame isn't copied
+        return orjson.loads(memoryview(buf)[:end])
+
+else:
+
+    def _encode_frame(command: Dict[str, Any]) -> bytes:
+        """Serialize a command as one newline-terminated frame."""
+        return (json.dumps(command) + "\n").encode("utf-8")
+
+    def _loads_frame(buf: bytearray, end: int) -> Any:
+        # json.loads takes bytes, so there is no separate decode
+        return json.loads(buf[:end])
+
+
+class _PreparedCommand(dict):
+    """A command whose frame is encoded once, when it is constructed.
+
+    Must not be modified after construction; the cached frame would go stale.
+    """
+
+    __slots__ = ("frame",)
+
+    def __init__(self, **fields: Any) -> None:
+        super().__init__(fields)
+        self.frame = _encode_frame(self)
+
+
+# Frames larger than this are encoded/decoded in a worker thread so the
+# event loop keeps serving other requests meanwhile
+_OFFLOAD_THRESHOLD = 64_000
+
+_GET_SCENE_INFO = _PreparedCommand(command="get_scene_info")
+_LIST_OBJECTS = _PreparedCommand(command="list_objects")
+
+
+# Kernel socket buffer size for the Cinema 4D connection; large enough
+# that a render_preview payload doesn't stall on a full receive window.
+_SOCKET_BUFFER_SIZE = 1 << 20
+_RECV_CHUNK_SIZE = 65536
+# Probe after 10s idle, every 5s, give up after 3 misses; drop the connection
+# if sent data stays unacknowledged for 15s
+_KEEPALIVE_OPTIONS = (
+    ("TCP_KEEPIDLE", 10),
+    ("TCP_KEEPINTVL", 5),
+    ("TCP_KEEPCNT", 3),
+    ("TCP_USER_TIMEOUT", 15000),
+)
+# Receive buffers that grew past this for one large response are dropped
+# afterwards, so an idle connection doesn't pin the memory.
+_RECV_BUFFER_HIGH_WATER = 1 << 20
+
 
 @dataclass
 class C4DConnection:
     sock: Optional[socket.socket] = None
     connected: bool = False
+    recv_buf: bytearray = field(default_factory=lambda: bytearray(_RECV_CHUNK_SIZE))
+    # Commands still waiting for a response, by id, oldest first
+    pending: Dict[int, asyncio.Future] = field(default_factory=dict)
+    next_id: int = 1
+    # Task reading responses and handing them to the waiting commands
+    reader: Optional[asyncio.Task] = None
+    # Keeps concurrent sendall() calls from interleaving their frames
+    write_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    def is_alive(self) -> bool:
+        """Check that the connection is open and its reader is still running."""
+        if not self.connected or not self.sock:
+            return False
+        return self.reader is None or not self.reader.done()
+
+    def fail_pending(self) -> None:
+        """Wake every waiting command with a connection error."""
+        pending, self.pending = self.pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("Connection to Cinema 4D lost"))
+
+    def answer_pending(self, response: Dict[str, Any]) -> None:
+        """Resolve every waiting command with its own copy of response."""
+        pending, self.pending = self.pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_result(dict(response))
+
+    def close(self) -> None:
+        """Close the socket and mark the connection as disconnected."""
+        if self.reader is not None:
+            self.reader.cancel()
+            self.reader = None
+        if self.sock:
+            self.sock.close()
+            logger.info("🔌 Disconnected from Cinema 4D")
+        self.sock = None
+        self.connected = False
+        self.fail_pending()
 
 
-# Asynchronous context manager for Cinema 4D connection
-@asynccontextmanager
-async def c4d_connection_context():
-    """Asynchronous context manager for Cinema 4D connection."""
-    connection = C4DConnection()
+# One connection to Cinema 4D is shared by every tool call. Commands carry an
+# id that Cinema 4D echoes back, so calls don't have to wait for each other;
+# the lock only serializes (re)connecting.
+_connection = C4DConnection()
+_connection_lock = asyncio.Lock()
+
+
+async def _connect(connection: C4DConnection) -> None:
+    """(Re)open the socket held by connection."""
+    connection.close()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     try:
-        # Initialize connection to Cinema 4D
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.connect((C4D_HOST, C4D_PORT))
+        # Commands are small single writes; don't let Nagle hold them back.
+        # Buffer sizes must be set before connect() to affect the TCP window.
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, _SOCKET_BUFFER_SIZE)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, _SOCKET_BUFFER_SIZE)
+        # The event loop drives all I/O on this socket
+        sock.setblocking(False)
+        await asyncio.get_running_loop().sock_connect(sock, (C4D_HOST, C4D_PORT))
+        if hasattr(socket, "TCP_QUICKACK"):  # Linux only
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+        # The connection sits idle between tool calls; keepalive probes and a
+        # user timeout notice a crashed Cinema 4D in ~15-25s rather than
+        # leaving a command hanging until its own timeout
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        for option, value in _KEEPALIVE_OPTIONS:
+            if hasattr(socket, option):  # Availability varies by platform
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
         connection.sock = sock
         connection.connected = True
         logger.info(f"✅ Connected to Cinema 4D at {C4D_HOST}:{C4D_PORT}")
-        yield connection  # Yield the connection
     except Exception as e:
         logger.error(f"❌ Failed to connect to Cinema 4D: {str(e)}")
-        connection.connected = False  # Ensure connection is marked as not connected
-        yield connection  # Still yield the connection object
+        sock.close()
+        connection.sock = None
+        connection.connected = False
+
+
+# Asynchronous context manager for Cinema 4D connection
+@asynccontextmanager
+async def c4d_connection_context():
+    """Asynchronous context manager for the shared Cinema 4D connection.
+
+    The socket stays open across tool calls and is only reopened once
+    Cinema 4D has dropped it.
+    """
+    async with _connection_lock:
+        if not _connection.is_alive():
+            await _connect(_connection)
+    yield _connection  # Still yielded when not connected
+
+
+@asynccontextmanager
+async def c4d_lifespan(server: FastMCP):
+    """Close the shared Cinema 4D connection when the MCP server shuts down."""
+    try:
+        yield {}
     finally:
-        # Clean up on server shutdown
-        if connection.sock:
-            connection.sock.close()
-            logger.info("🔌 Disconnected from Cinema 4D")
+        _connection.close()
 
 
-def send_to_c4d(connection: C4DConnection, command: Dict[str, Any]) -> Dict[str, Any]:
-    """Send a command to Cinema 4D and get the response with improved timeout handling."""
-    if not connection.connected or not connection.sock:
-        return {"error": "Not connected to Cinema 4D"}
+# Long-running operations need longer timeouts
+_EXTENDED_TIMEOUT_COMMANDS = ("render_frame", "apply_mograph_fields")
 
-    # Set appropriate timeout based on command type
-    command_type = command.get("command", "")
 
-    # Long-running operations need longer timeouts
-    if command_type in ["render_frame", "apply_mograph_fields"]:
+def _command_timeout(command_type: str) -> int:
+    """Seconds to wait for the response to a command of this type."""
+    if command_type in _EXTENDED_TIMEOUT_COMMANDS:
         timeout = 120  # 2 minutes for render operations
         logger.info(f"Using extended timeout ({timeout}s) for {command_type}")
+        return timeout
+    return 20  # Default timeout for regular operations
+
+
+async def _receive_frame(connection: C4DConnection, used: int) -> tuple:
+    """Read until the newline that ends a response; returns (used, end).
+
+    used is the number of bytes already at the front of the buffer (left
+    over from the previous response). end is -1 if Cinema 4D closed the
+    connection before sending the newline.
+    """
+    buf = connection.recv_buf
+    if used:
+        end = buf.find(b"\n", 0, used)
+        if end != -1:
+            return used, end
+
+    loop = asyncio.get_running_loop()
+    view = memoryview(buf)
+    try:
+        while True:
+            if used == len(buf):
+                # Double the buffer (the view has to go before a resize)
+                view.release()
+                buf.extend(bytes(len(buf)))
+                view = memoryview(buf)
+                connection.recv_buf = buf
+
+            received = await loop.sock_recv_into(connection.sock, view[used:])
+            if not received:
+                # If we receive an empty chunk, the connection might be closed
+                return used, -1
+
+            used += received
+
+            # Message complete when we see a newline; only the bytes just
+            # received need scanning
+            end = buf.find(b"\n", used - received, used)
+            if end != -1:
+                return used, end
+    finally:
+        view.release()
+
+
+def _parse_frame(buf: bytearray, end: int) -> Dict[str, Any]:
+    """Decode the response frame buf[:end], logging it if it isn't valid JSON."""
+    try:
+        return _loads_frame(buf, end)
+    except json.JSONDecodeError as e:  # orjson's error subclasses this too
+        # If JSON parsing fails, log the exact response for debugging
+        logger.error(f"Failed to parse JSON response: {str(e)}")
+        logger.error(
+            f"Raw response (first 200 chars): {buf[:min(end, 200)].decode('utf-8', 'replace')}..."
+        )
+        raise
+
+
+def _deliver(connection: C4DConnection, response: Any) -> None:
+    """Resolve the pending command a response belongs to."""
+    if isinstance(response, dict) and "id" in response:
+        future = connection.pending.pop(response.pop("id"), None)
+        if future is None:
+            # Most likely the late answer to a command that already timed out
+            logger.warning("Dropping a Cinema 4D response nobody is waiting for")
+        elif not future.done():
+            future.set_result(response)
+        return
+
+    # Plugins from before concurrent commands don't echo the id. With a single
+    # command in flight the response can only be its answer; with more,
+    # guessing could hand it to another tool call's command
+    if len(connection.pending) == 1:
+        _, future = connection.pending.popitem()
+        if not future.done():
+            future.set_result(response)
+    elif connection.pending:
+        logger.error("Cinema 4D sent a response without a command id")
+        connection.answer_pending({"error": _MISSING_ID_ERROR})
     else:
-        timeout = 20  # Default timeout for regular operations
+        logger.warning("Dropping a Cinema 4D response nobody is waiting for")
+
 
+_MISSING_ID_ERROR = (
+    "Cinema 4D sent a response without a command id; the plugin is probably "
+    "out of date. Reinstall c4d_plugin/mcp_server_plugin.pyp and restart Cinema 4D."
+)
+
+
+async def _read_responses(connection: C4DConnection) -> None:
+    """Route every response frame on the connection to its command."""
+    used = 0
     try:
-        # Convert command to JSON and send it
-        command_json = json.dumps(command) + "\n"  # Add newline as message delimiter
-        logger.debug(f"Sending command: {command_type}")
-        connection.sock.sendall(command_json.encode("utf-8"))
+        while True:
+            used, end = await _receive_frame(connection, used)
+            if end == -1:
+                logger.error("Connection closed by Cinema 4D")
+                break
+
+            buf = connection.recv_buf
+            parse_error = None
+            try:
+                if end > _OFFLOAD_THRESHOLD:
+                    # Only this task touches buf, so it's safe until the thread is done
+                    response = await asyncio.to_thread(_parse_frame, buf, end)
+                else:
+                    response = _parse_frame(buf, end)
+            except json.JSONDecodeError as e:
+                parse_error = f"Invalid response from Cinema 4D: {str(e)}"
+            logger.debug("Received complete response (%d bytes)", end)
+
+            # Move any bytes of the next response to the front
+            used -= end + 1
+            if len(buf) > _RECV_BUFFER_HIGH_WATER and used < _RECV_CHUNK_SIZE:
+                connection.recv_buf = bytearray(_RECV_CHUNK_SIZE)
+                connection.recv_buf[:used] = buf[end + 1 : end + 1 + used]
+            elif used:
+                buf[:used] = buf[end + 1 : end + 1 + used]
+
+            if parse_error is not None:
+                # There's no telling which command the frame answered
+                connection.answer_pending({"error": parse_error})
+            else:
+                _deliver(connection, response)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"Communication error: {str(e)}")
+
+    connection.connected = False
+    connection.fail_pending()
 
-        # Set socket timeout
-        connection.sock.settimeout(timeout)
 
-        # Receive response
-        response_data = b""
-        start_time = time.time()
-        max_time = start_time + timeout
+def _command_error(command: Any) -> Optional[str]:
+    """Return why command can't be sent to Cinema 4D, or None if it can."""
+    if not isinstance(command, dict):
+        return "Invalid command: expected an object"
+    command_type = command.get("command")
+    if not isinstance(command_type, str) or not command_type:
+        return 'Invalid command: missing "command" name'
+    return None
+
+
+def _frame_with_id(command: Dict[str, Any], command_id: int) -> bytes:
+    """Encode command with its id spliced in as the first field."""
+    frame = command.frame if type(command) is _PreparedCommand else _encode_frame(command)
+    # _exchange only sends commands with a "command" key, so the object isn't empty
+    return b'{"id":%d,%s' % (command_id, frame[1:])
+
+
+async def _exchange(
+    connection: C4DConnection, commands: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Write all commands in one send, then wait for each one's response.
+
+    Other tool calls can have commands in flight on the same connection at
+    the same time; the reader task hands each response to its own command.
+    Malformed commands are answered with an error and never sent.
+    """
+    loop = asyncio.get_running_loop()
+    if connection.reader is None or connection.reader.done():
+        connection.reader = loop.create_task(_read_responses(connection))
+
+    responses: List[Optional[Dict[str, Any]]] = [None] * len(commands)
+    waiting = []
+    for index, command in enumerate(commands):
+        error = _command_error(command)
+        if error is not None:
+            responses[index] = {"error": error}
+            continue
+        if "id" in command:
+            # The id is ours to assign; a caller's would misroute the response
+            command = {key: value for key, value in command.items() if key != "id"}
+        command_id = connection.next_id
+        connection.next_id += 1
+        future = loop.create_future()
+        connection.pending[command_id] = future
+        waiting.append((index, command, command_id, future))
+
+    if not waiting:
+        return responses
+
+    try:
+        frames = [
+            _frame_with_id(command, command_id) for _, command, command_id, _ in waiting
+        ]
+        if logger.isEnabledFor(logging.DEBUG):
+            for _, command, _, _ in waiting:
+                logger.debug("Sending command: %s", command["command"])
+        async with connection.write_lock:
+            await loop.sock_sendall(connection.sock, b"".join(frames))
+    except asyncio.CancelledError:
+        # Part of a frame may already be out, and whatever is sent next would
+        # be read as the rest of it; reconnect rather than reuse the stream
+        for _, _, command_id, _ in waiting:
+            connection.pending.pop(command_id, None)
+        connection.connected = False
+        raise
+    except Exception as e:
+        logger.error(f"Communication error while sending: {str(e)}")
+        for index, _, command_id, _ in waiting:
+            connection.pending.pop(command_id, None)
+            responses[index] = {"error": f"Communication error: {str(e)}"}
+        # Only a failed socket ends the connection; anything else (such as a
+        # command that can't be encoded) leaves it usable for the next call
+        if isinstance(e, OSError):
+            connection.connected = False
+        return responses
+
+    # Cinema 4D runs the commands in order and may send their responses
+    # together, so each one's deadline also covers the commands before it
+    deadline = loop.time()
+    for index, command, command_id, future in waiting:
+        command_type = command["command"]
+        timeout = _command_timeout(command_type)
+        deadline += timeout
 
         # Log for long-running operations
-        if command_type in ["render_frame", "apply_mograph_fields"]:
+        if command_type in _EXTENDED_TIMEOUT_COMMANDS:
             logger.info(
                 f"Waiting for response from {command_type} (timeout: {timeout}s)"
             )
 
-        while time.time() < max_time:
-            try:
-                chunk = connection.sock.recv(4096)
-                if not chunk:
-                    # If we receive an empty chunk, the connection might be closed
-                    if not response_data:
-                        logger.error(
-                            f"Connection closed by Cinema 4D during {command_type}"
-                        )
-                        return {
-                            "error": f"Connection closed by Cinema 4D during {command_type}"
-                        }
-                    break
-
-                response_data += chunk
-
-                # For long operations, log progress on data receipt
-                elapsed = time.time() - start_time
-                if (
-                    command_type in ["render_frame", "apply_mograph_fields"]
-                    and elapsed > 5
-                ):
-                    logger.debug(
-                        f"Received partial data for {command_type} ({len(response_data)} bytes, {elapsed:.1f}s elapsed)"
-                    )
-
-                if b"\n" in chunk:  # Message complete when we see a newline
-                    logger.debug(f"Received complete response for {command_type}")
-                    break
-
-            except socket.timeout:
-                logger.error(f"Socket timeout while receiving data for {command_type}")
-                return {
-                    "error": f"Timeout waiting for response from Cinema 4D ({timeout}s) for {command_type}"
-                }
-
-        # Parse and return response
-        if not response_data:
-            logger.error(f"No response received from Cinema 4D for {command_type}")
-            return {"error": f"No response received from Cinema 4D for {command_type}"}
-
-        response_text = response_data.decode("utf-8").strip()
-
         try:
-            return json.loads(response_text)
-        except json.JSONDecodeError as e:
-            # If JSON parsing fails, log the exact response for debugging
-            logger.error(f"Failed to parse JSON response: {str(e)}")
-            logger.error(f"Raw response (first 200 chars): {response_text[:200]}...")
-            return {"error": f"Invalid response from Cinema 4D: {str(e)}"}
-
-    except socket.timeout:
-        logger.error(f"Socket timeout during {command_type} ({timeout}s)")
-        return {
-            "error": f"Timeout communicating with Cinema 4D ({timeout}s) for {command_type}"
-        }
-    except Exception as e:
-        logger.error(f"Communication error during {command_type}: {str(e)}")
-        return {"error": f"Communication error: {str(e)}"}
-
-
-async def homepage(request):
-    """Handle homepage requests to check if server is running."""
-    c4d_available = check_c4d_connection(C4D_HOST, C4D_PORT)
-    return JSONResponse(
-        {
-            "status": "ok",
-            "cinema4d_connected": c4d_available,
-            "host": C4D_HOST,
-            "port": C4D_PORT,
-        }
-    )
+            responses[index] = await asyncio.wait_for(
+                future, max(deadline - loop.time(), 0)
+            )
+        except asyncio.TimeoutError:
+            # A late response for this id is dropped when it arrives
+            connection.pending.pop(command_id, None)
+            logger.error(f"Timeout while waiting for response to {command_type}")
+            responses[index] = {
+                "error": f"Timeout waiting for response from Cinema 4D ({timeout}s) for {command_type}"
+            }
+        except asyncio.CancelledError:
+            # Nobody is waiting any more; forget the ids so a response
+            # without one isn't taken for theirs
+            for _, _, waiting_id, _ in waiting:
+                connection.pending.pop(waiting_id, None)
+            raise
+        except ConnectionError:
+            logger.error(f"Connection closed by Cinema 4D during {command_type}")
+            responses[index] = {
+                "error": f"Connection closed by Cinema 4D during {command_type}"
+            }
+
+    return responses
+
+
+async def send_to_c4d(
+    connection: C4DConnection, command: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Send a command to Cinema 4D and get the response with improved timeout handling."""
+    if not connection.connected or not connection.sock:
+        return {"error": "Not connected to Cinema 4D"}
+
+    return (await _exchange(connection, [command]))[0]
+
+
+async def send_batch_to_c4d(
+    connection: C4DConnection, commands: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Pipeline several commands to Cinema 4D, paying one round trip for all."""
+    if not connection.connected or not connection.sock:
+        return [{"error": "Not connected to Cinema 4D"}] * len(commands)
+
+    return await _exchange(connection, commands)
 
 
 # Initialize our FastMCP server
-mcp = FastMCP(title="Cinema4D", routes=[Route("/", endpoint=homepage)])
+mcp = FastMCP(title="Cinema4D", lifespan=c4d_lifespan)
+
+
+def _present(**fields: Any) -> Dict[str, Any]:
+    """Return the optional command parameters that were actually given."""
+    return {key: value for key, value in fields.items() if value}
+
+
+_SCENE_INFO_TMPL = """
+# Cinema 4D Scene Information
+- **Filename**: {filename}
+- **Objects**: {object_count}
+- **Polygons**: {polygon_count:,}
+- **Materials**: {material_count}
+- **Current Frame**: {current_frame}
+- **FPS**: {fps}
+- **Frame Range**: {frame_start} - {frame_end}
+"""
+# Shown for any field the plugin leaves out of scene_info
+_SCENE_INFO_DEFAULTS = {
+    "filename": "Untitled",
+    "object_count": 0,
+    "polygon_count": 0,
+    "material_count": 0,
+    "current_frame": 0,
+    "fps": 30,
+    "frame_start": 0,
+    "frame_end": 90,
+}
 
 
 @mcp.tool()
@@ -167,23 +506,14 @@ async def get_scene_info(ctx: Context) -> str:
         if not connection.connected:
             return "❌ Not connected to Cinema 4D"
 
-        response = send_to_c4d(connection, {"command": "get_scene_info"})
+        response = await send_to_c4d(connection, _GET_SCENE_INFO)
 
         if "error" in response:
             return f"❌ Error: {response['error']}"
 
         # Format scene info nicely
         scene_info = response.get("scene_info", {})
-        return f"""
-# Cinema 4D Scene Information
-- **Filename**: {scene_info.get('filename', 'Untitled')}
-- **Objects**: {scene_info.get('object_count', 0)}
-- **Polygons**: {scene_info.get('polygon_count', 0):,}
-- **Materials**: {scene_info.get('material_count', 0)}
-- **Current Frame**: {scene_info.get('current_frame', 0)}
-- **FPS**: {scene_info.get('fps', 30)}
-- **Frame Range**: {scene_info.get('frame_start', 0)} - {scene_info.get('frame_end', 90)}
-"""
+        return _SCENE_INFO_TMPL.format_map(ChainMap(scene_info, _SCENE_INFO_DEFAULTS))
 
 
 @mcp.tool()
@@ -211,17 +541,11 @@ async def add_primitive(
         command = {
             "command": "add_primitive",
             "type": primitive_type,
+            **_present(object_name=name, position=position, size=size),
         }
 
-        if name:
-            command["object_name"] = name
-        if position:
-            command["position"] = position
-        if size:
-            command["size"] = size
-
         # Send command to Cinema 4D
-        response = send_to_c4d(connection, command)
+        response = await send_to_c4d(connection, command)
 
         if "error" in response:
             return f"❌ Error: {response['error']}"
@@ -246,7 +570,7 @@ async def modify_object(
             return "❌ Not connected to Cinema 4D"
 
         # Send command to Cinema 4D
-        response = send_to_c4d(
+        response = await send_to_c4d(
             connection,
             {
                 "command": "modify_object",
@@ -258,11 +582,6 @@ async def modify_object(
         if "error" in response:
             return f"❌ Error: {response['error']}"
 
-        # Generate summary of what was modified
-        modified_props = []
-        for prop, value in properties.items():
-            modified_props.append(f"- **{prop}**: {value}")
-
         return response
 
 
@@ -273,7 +592,7 @@ async def list_objects(ctx: Context) -> str:
         if not connection.connected:
             return "❌ Not connected to Cinema 4D"
 
-        response = send_to_c4d(connection, {"command": "list_objects"})
+        response = await send_to_c4d(connection, _LIST_OBJECTS)
 
         if "error" in response:
             return f"❌ Error: {response['error']}"
@@ -282,13 +601,6 @@ async def list_objects(ctx: Context) -> str:
         if not objects:
             return "No objects found in the scene."
 
-        # Format objects as a hierarchical list with indentation
-        object_list = []
-        for obj in objects:
-            # Calculate indentation based on object's depth in hierarchy
-            indent = "  " * obj.get("depth", 0)
-            object_list.append(f"{indent}- **{obj['name']}** ({obj['type']})")
-
         return response
 
 
@@ -312,15 +624,14 @@ async def create_material(
             return "❌ Not connected to Cinema 4D"
 
         # Prepare command
-        command = {"command": "create_material", "material_name": name}
-
-        if color:
-            command["color"] = color
-        if properties:
-            command["properties"] = properties
+        command = {
+            "command": "create_material",
+            "material_name": name,
+            **_present(color=color, properties=properties),
+        }
 
         # Send command to Cinema 4D
-        response = send_to_c4d(connection, command)
+        response = await send_to_c4d(connection, command)
 
         if "error" in response:
             return f"❌ Error: {response['error']}"
@@ -343,7 +654,7 @@ async def apply_material(material_name: str, object_name: str, ctx: Context) ->
             return "❌ Not connected to Cinema 4D"
 
         # Send command to Cinema 4D
-        response = send_to_c4d(
+        response = await send_to_c4d(
             connection,
             {
                 "command": "apply_material",
@@ -378,17 +689,13 @@ async def render_frame(
             return "❌ Not connected to Cinema 4D"
 
         # Prepare command
-        command = {"command": "render_frame"}
-
-        if output_path:
-            command["output_path"] = output_path
-        if width:
-            command["width"] = width
-        if height:
-            command["height"] = height
+        command = {
+            "command": "render_frame",
+            **_present(output_path=output_path, width=width, height=height),
+        }
 
         # Send command to Cinema 4D
-        response = send_to_c4d(connection, command)
+        response = await send_to_c4d(connection, command)
 
         if "error" in response:
             return f"❌ Error: {response['error']}"
@@ -415,7 +722,7 @@ async def set_keyframe(
             return "❌ Not connected to Cinema 4D"
 
         # Send command to Cinema 4D
-        response = send_to_c4d(
+        response = await send_to_c4d(
             connection,
             {
                 "command": "set_keyframe",
@@ -438,20 +745,18 @@ async def save_scene(file_path: Optional[str] = None, ctx: Context = None) -> st
     Save the current Cinema 4D scene.
 
     Args:
-        file_path: Optional path to save the scene to
+        file_path: Optional path to save the scene to; defaults to the
+            document's current file. Required for a scene that was never saved.
     """
     async with c4d_connection_context() as connection:
         if not connection.connected:
             return "❌ Not connected to Cinema 4D"
 
         # Prepare command
-        command = {"command": "save_scene"}
-
-        if file_path:
-            command["file_path"] = file_path
+        command = {"command": "save_scene", **_present(file_path=file_path)}
 
         # Send command to Cinema 4D
-        response = send_to_c4d(connection, command)
+        response = await send_to_c4d(connection, command)
 
         if "error" in response:
             return f"❌ Error: {response['error']}"
@@ -472,7 +777,7 @@ async def load_scene(file_path: str, ctx: Context) -> str:
             return "❌ Not connected to Cinema 4D"
 
         # Send command to Cinema 4D
-        response = send_to_c4d(
+        response = await send_to_c4d(
             connection, {"command": "load_scene", "file_path": file_path}
         )
 
@@ -497,12 +802,13 @@ async def create_mograph_cloner(
         if not connection.connected:
             return "❌ Not connected to Cinema 4D"
 
-        command = {"command": "create_mograph_cloner", "mode": cloner_type}
-
-        if name:
-            command["cloner_name"] = name
+        command = {
+            "command": "create_mograph_cloner",
+            "mode": cloner_type,
+            **_present(cloner_name=name),
+        }
 
-        response = send_to_c4d(connection, command)
+        response = await send_to_c4d(connection, command)
 
         if "error" in response:
             return f"❌ Error: {response['error']}"
@@ -530,15 +836,13 @@ async def add_effector(
         if not connection.connected:
             return "❌ Not connected to Cinema 4D"
 
-        command = {"command": "add_effector", "effector_type": effector_type}
-
-        if name:
-            command["effector_name"] = name
-
-        if target:
-            command["cloner_name"] = target
+        command = {
+            "command": "add_effector",
+            "effector_type": effector_type,
+            **_present(effector_name=name, cloner_name=target),
+        }
 
-        response = send_to_c4d(connection, command)
+        response = await send_to_c4d(connection, command)
 
         if "error" in response:
             return f"❌ Error: {response['error']}"
@@ -568,24 +872,20 @@ async def apply_mograph_fields(
         if not connection.connected:
             return "❌ Not connected to Cinema 4D"
 
-        # Build the command with required parameters
-        command = {"command": "apply_mograph_fields", "field_type": field_type}
-
-        # Add optional parameters
-        if target:
-            command["target_name"] = target
-
-        if field_name:
-            command["field_name"] = field_name
-
-        if parameters:
-            command["parameters"] = parameters
+        # Build the command with required and any given optional parameters
+        command = {
+            "command": "apply_mograph_fields",
+            "field_type": field_type,
+            **_present(
+                target_name=target, field_name=field_name, parameters=parameters
+            ),
+        }
 
         # Log the command for debugging
-        logger.info(f"Sending apply_mograph_fields command: {command}")
+        logger.debug("Sending apply_mograph_fields command: %s", command)
 
         # Send the command to Cinema 4D
-        response = send_to_c4d(connection, command)
+        response = await send_to_c4d(connection, command)
 
         # Handle error responses
         if "error" in response:
@@ -593,20 +893,6 @@ async def apply_mograph_fields(
             logger.error(f"Error applying field: {error_msg}")
             return f"❌ Error: {error_msg}"
 
-        # Extract field info from response
-        field_info = response.get("field", {})
-
-        # Build a response message
-        field_name = field_info.get("name", f"{field_type.capitalize()} Field")
-        applied_to = field_info.get("applied_to", "None")
-
-        # Additional parameters if available
-        params_info = ""
-        if "strength" in field_info:
-            params_info += f"\n- **Strength**: {field_info.get('strength')}"
-        if "falloff" in field_info:
-            params_info += f"\n- **Falloff**: {field_info.get('falloff')}"
-
         return response
 
 
@@ -622,7 +908,7 @@ async def create_soft_body(object_name: str, ctx: Context = None) -> str:
         if not connection.connected:
             return "❌ Not connected to Cinema 4D"
 
-        response = send_to_c4d(
+        response = await send_to_c4d(
             connection, {"command": "create_soft_body", "object_name": object_name}
         )
 
@@ -647,7 +933,7 @@ async def apply_dynamics(
         if not connection.connected:
             return "❌ Not connected to Cinema 4D"
 
-        response = send_to_c4d(
+        response = await send_to_c4d(
             connection,
             {
                 "command": "apply_dynamics",
@@ -677,12 +963,13 @@ async def create_abstract_shape(
         if not connection.connected:
             return "❌ Not connected to Cinema 4D"
 
-        command = {"command": "create_abstract_shape", "shape_type": shape_type}
-
-        if name:
-            command["object_name"] = name
+        command = {
+            "command": "create_abstract_shape",
+            "shape_type": shape_type,
+            **_present(object_name=name),
+        }
 
-        response = send_to_c4d(connection, command)
+        response = await send_to_c4d(connection, command)
 
         if "error" in response:
             return f"❌ Error: {response['error']}"
@@ -714,17 +1001,13 @@ async def create_camera(
             # Return error as dictionary for consistency
             return {"error": "❌ Not connected to Cinema 4D"}
 
-        command = {"command": "create_camera"}
-        if requested_name:
-            command["name"] = (
-                requested_name  # Use the 'name' key expected by the handler
-            )
-        if position:
-            command["position"] = position
-        if properties:
-            command["properties"] = properties
+        command = {
+            "command": "create_camera",
+            # Use the 'name' key expected by the handler
+            **_present(name=requested_name, position=position, properties=properties),
+        }
 
-        response = send_to_c4d(connection, command)
+        response = await send_to_c4d(connection, command)
 
         return response
 
@@ -744,12 +1027,13 @@ async def create_light(
         if not connection.connected:
             return "❌ Not connected to Cinema 4D"
 
-        command = {"command": "create_light", "type": light_type}
-
-        if name:
-            command["object_name"] = name
+        command = {
+            "command": "create_light",
+            "type": light_type,
+            **_present(object_name=name),
+        }
 
-        response = send_to_c4d(connection, command)
+        response = await send_to_c4d(connection, command)
 
         if "error" in response:
             return f"❌ Error: {response['error']}"
@@ -777,24 +1061,17 @@ async def apply_shader(
         if not connection.connected:
             return "❌ Not connected to Cinema 4D"
 
-        command = {"command": "apply_shader", "shader_type": shader_type}
-
-        if material_name:
-            command["material_name"] = material_name
-
-        if object_name:
-            command["object_name"] = object_name
+        command = {
+            "command": "apply_shader",
+            "shader_type": shader_type,
+            **_present(material_name=material_name, object_name=object_name),
+        }
 
-        response = send_to_c4d(connection, command)
+        response = await send_to_c4d(connection, command)
 
         if "error" in response:
             return f"❌ Error: {response['error']}"
 
-        shader_info = response.get("shader", {})
-        material_name = shader_info.get("material", "New Material")
-        applied_to = shader_info.get("applied_to", "None")
-        applied_msg = f" and applied to '{applied_to}'" if applied_to != "None" else ""
-
         return response
 
 
@@ -861,25 +1138,11 @@ async def animate_camera(
                 command["frames"] = orbit_frames
 
         # Send the command to Cinema 4D
-        response = send_to_c4d(connection, command)
+        response = await send_to_c4d(connection, command)
 
         if "error" in response:
             return f"❌ Error: {response['error']}"
 
-        # Get the camera animation info
-        camera_info = response.get("camera_animation", {})
-
-        # Build a response message
-        frames_info = ""
-        if "frame_range" in camera_info:
-            frames_info = (
-                f"\n- **Frame Range**: {camera_info.get('frame_range', [0, 0])}"
-            )
-
-        keyframe_info = ""
-        if "keyframe_count" in camera_info:
-            keyframe_info = f"\n- **Keyframes**: {camera_info.get('keyframe_count', 0)}"
-
         return response
 
 
@@ -896,9 +1159,10 @@ async def execute_python_script(script: str, ctx: Context) -> str:
             return "❌ Not connected to Cinema 4D"
 
         # Send command to Cinema 4D
-        response = send_to_c4d(
-            connection, {"command": "execute_python", "script": script}
-        )
+        command = {"command": "execute_python", "script": script}
+        if len(script) > _OFFLOAD_THRESHOLD:
+            command = await asyncio.to_thread(_PreparedCommand, **command)
+        response = await send_to_c4d(connection, command)
 
         if "error" in response:
             return f"❌ Error: {response['error']}"
@@ -923,25 +1187,18 @@ async def group_objects(
             return "❌ Not connected to Cinema 4D"
 
         # Prepare command
-        command = {"command": "group_objects", "object_names": object_names}
-
-        if group_name:
-            command["group_name"] = group_name
+        command = {
+            "command": "group_objects",
+            "object_names": object_names,
+            **_present(group_name=group_name),
+        }
 
         # Send command to Cinema 4D
-        response = send_to_c4d(connection, command)
+        response = await send_to_c4d(connection, command)
 
         if "error" in response:
             return f"❌ Error: {response['error']}"
 
-        group_info = response.get("group", {})
-
-        # Format object list for display
-        objects_str = ", ".join(object_names)
-        if len(objects_str) > 50:
-            # Truncate if too long
-            objects_str = objects_str[:47] + "..."
-
         return response
 
 
@@ -965,20 +1222,16 @@ async def render_preview(
             return "❌ Not connected to Cinema 4D"
 
         # Prepare command
-        command = {"command": "render_preview"}
+        command = {"command": "render_preview", **_present(width=width, height=height)}
 
-        if width:
-            command["width"] = width
-        if height:
-            command["height"] = height
-        if frame is not None:
+        if frame is not None:  # Frame 0 is a valid choice
             command["frame"] = frame
 
         # Set longer timeout for rendering
-        logger.info(f"Sending render_preview command with parameters: {command}")
+        logger.debug("Sending render_preview command with parameters: %s", command)
 
         # Send command to Cinema 4D
-        response = send_to_c4d(connection, command)
+        response = await send_to_c4d(connection, command)
 
         if "error" in response:
             return f"❌ Error: {response['error']}"
@@ -1016,39 +1269,63 @@ async def snapshot_scene(
             return "❌ Not connected to Cinema 4D"
 
         # Prepare command
-        command = {"command": "snapshot_scene"}
-
-        if file_path:
-            command["file_path"] = file_path
-
-        command["include_assets"] = include_assets
+        command = {
+            "command": "snapshot_scene",
+            **_present(file_path=file_path),
+            "include_assets": include_assets,
+        }
 
         # Send command to Cinema 4D
-        response = send_to_c4d(connection, command)
+        response = await send_to_c4d(connection, command)
 
         if "error" in response:
             return f"❌ Error: {response['error']}"
 
-        snapshot_info = response.get("snapshot", {})
+        return response
 
-        # Extract information
-        path = snapshot_info.get("path", file_path or "Default location")
-        size = snapshot_info.get("size", "Unknown")
-        timestamp = snapshot_info.get("timestamp", "Unknown")
 
-        # Format assets information if available
-        assets_info = ""
-        if "assets" in snapshot_info:
-            assets_count = len(snapshot_info["assets"])
-            assets_info = f"\n- **Assets Included**: {assets_count}"
+@mcp.tool()
+async def batch(
+    commands: List[Dict[str, Any]], ctx: Context = None
+) -> List[Dict[str, Any]]:
+    """
+    Run several Cinema 4D commands in one round trip, in order.
 
-        return response
+    Use this for independent steps that would otherwise be separate tool
+    calls. Objects created earlier in the batch can be referenced by name,
+    but GUIDs from earlier responses are not available yet.
 
+    Args:
+        commands: Plugin commands, each with a "command" key and its parameters
+            (e.g. {"command": "add_primitive", "type": "cube", "object_name": "Box"})
+    """
+    # One result per command, in order; malformed commands are never sent
+    results: List[Optional[Dict[str, Any]]] = [None] * len(commands)
+    to_send = []
+    for index, command in enumerate(commands):
+        error = _command_error(command)
+        if error is not None:
+            results[index] = {"error": f"❌ Command {index + 1}: {error}"}
+        else:
+            to_send.append(index)
+    if not to_send:
+        return results
 
-@mcp.resource("c4d://primitives")
-def get_primitives_info() -> str:
-    """Get information about available Cinema 4D primitives."""
-    return """
+    async with c4d_connection_context() as connection:
+        if not connection.connected:
+            return [{"error": "❌ Not connected to Cinema 4D"}] * len(commands)
+
+        # One write for every command, then one response per command
+        responses = await send_batch_to_c4d(
+            connection, [commands[index] for index in to_send]
+        )
+
+    for index, response in zip(to_send, responses):
+        results[index] = response
+    return results
+
+
+_PRIMITIVES_INFO = """
 # Cinema 4D Primitive Objects
 
 ## Cube
@@ -1077,10 +1354,13 @@ def get_primitives_info() -> str:
 """
 
 
-@mcp.resource("c4d://material_types")
-def get_material_types() -> str:
-    """Get information about available Cinema 4D material types and their properties."""
-    return """
+@mcp.resource("c4d://primitives")
+def get_primitives_info() -> str:
+    """Get information about available Cinema 4D primitives."""
+    return _PRIMITIVES_INFO
+
+
+_MATERIAL_TYPES_INFO = """
 # Cinema 4D Material Types
 
 ## Standard Material
@@ -1102,22 +1382,32 @@ def get_material_types() -> str:
 """
 
 
-@mcp.resource("c4d://status")
-def get_connection_status() -> str:
-    """Get the current connection status to Cinema 4D."""
-    is_connected = check_c4d_connection(C4D_HOST, C4D_PORT)
-    status = (
-        "✅ Connected to Cinema 4D" if is_connected else "❌ Not connected to Cinema 4D"
-    )
+@mcp.resource("c4d://material_types")
+def get_material_types() -> str:
+    """Get information about available Cinema 4D material types and their properties."""
+    return _MATERIAL_TYPES_INFO
+
 
-    return f"""
+# Host and port are fixed for the process, so both possible status pages
+# are rendered once here
+_STATUS_TMPL = Template("""
 # Cinema 4D Connection Status
-{status}
+$status
 
 ## Connection Details
-- **Host**: {C4D_HOST}
-- **Port**: {C4D_PORT}
-"""
+- **Host**: $host
+- **Port**: $port
+""")
+_STATUS_CONNECTED = _STATUS_TMPL.substitute(
+    status="✅ Connected to Cinema 4D", host=C4D_HOST, port=C4D_PORT
+)
+_STATUS_DISCONNECTED = _STATUS_TMPL.substitute(
+    status="❌ Not connected to Cinema 4D", host=C4D_HOST, port=C4D_PORT
+)
 
 
-mcp_app = mcp
+@mcp.resource("c4d://status")
+def get_connection_status() -> str:
+    """Get the current connection status to Cinema 4D."""
+    is_connected = check_c4d_connection(C4D_HOST, C4D_PORT)
+    return _STATUS_CONNECTED if is_connected else _STATUS_DISCONNECTED
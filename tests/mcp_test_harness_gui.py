@@ -1,14 +1,107 @@
 import socket
 import json
-import time
+import mmap
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext
 import threading
+import queue
+import time
+import traceback
 import os
-import copy  # Needed for deep copying commands
+import re
+import sys
+from collections import deque
+
+# Long test files and large responses parse faster with orjson, if it's there
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    _loads = orjson.loads
+
+    def _encode(command):
+        """Serialize a command as one line of JSON, without the newline."""
+        return orjson.dumps(command)
+
+else:
+    _loads = json.loads
+
+    def _encode(command):
+        """Serialize a command as one line of JSON, without the newline."""
+        return json.dumps(command).encode("utf-8")
+
+# Response keys that hold the context of a created object
+_CONTEXT_KEYS = frozenset(
+    {
+        "object",
+        "light",
+        "camera",
+        "material",
+        "cloner",
+        "effector",
+        "field",
+        "shape",
+        "group",
+    }
+)
+# Common keys for base64 data, truncated in the log
+_TRUNC_KEYS = ("image_base64", "image_data")
+
+# Long base64 fields in a raw response; shortened before parsing, so the full
+# image string is never decoded just to be cut for the log
+_BASE64_FIELD = re.compile(
+    rb'("(?:'
+    + b"|".join(key.encode("ascii") for key in _TRUNC_KEYS)
+    + rb')"\s*:\s*")([^"\\]{101,})"'
+)
+
+
+def _truncate_base64(match):
+    return match.group(1) + match.group(2)[:50] + b'... [truncated]"'
+
+
+# Names spelled the same inside a JSON string as outside one
+_PLAIN_NAME = re.compile(r'[ !#-\[\]-~]*')
+
+
+def _send_line(sock, payload):
+    """Sends payload and its newline terminator without joining them first."""
+    if not hasattr(sock, "sendmsg"):  # e.g. Windows
+        sock.sendall(payload + b"\n")
+        return
+    sent = sock.sendmsg([payload, b"\n"])
+    # sendmsg may write only part of it; send whatever is left
+    if sent < len(payload):
+        sock.sendall(memoryview(payload)[sent:])
+    if sent <= len(payload):
+        sock.sendall(b"\n")
+
+
+def _mapped_lines(f):
+    """Yields the lines of an open binary file as bytes, without decoding.
+
+    The file is memory-mapped and split with bytes.find, so there is no
+    per-line readline or UTF-8 decode.
+    """
+    if os.fstat(f.fileno()).st_size == 0:
+        return  # An empty file can't be mapped
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = 0
+        size = len(mm)
+        while pos < size:
+            end = mm.find(b"\n", pos)
+            if end == -1:
+                end = size
+            yield mm[pos:end]
+            pos = end + 1
+
 
 SERVER_HOST = "localhost"
 SERVER_PORT = 5555
+# Optional delay between commands, for plugins that need pacing
+PACING_MS = 0
 
 
 class MCPTestHarnessGUI:
@@ -25,6 +118,14 @@ class MCPTestHarnessGUI:
         self.browse_button.grid(row=0, column=2)
         self.run_button = tk.Button(root, text="Run Test", command=self.run_test_thread)
         self.run_button.grid(row=1, column=1, pady=10)
+        # Pretty-print responses and log each substitution; off by default
+        # since both are costly on long test files
+        self.verbose_var = tk.BooleanVar(value=False)
+        self.verbose_check = tk.Checkbutton(
+            root, text="Verbose log", variable=self.verbose_var
+        )
+        self.verbose_check.grid(row=1, column=2)
+        self._verbose = False
         self.log_text = scrolledtext.ScrolledText(
             root, wrap=tk.WORD, width=80, height=30
         )
@@ -32,6 +133,17 @@ class MCPTestHarnessGUI:
 
         # --- ADDED: Storage for GUIDs ---
         self.guid_map = {}  # Maps requested_name -> actual_guid
+        self._sub_pattern = None  # Finds any guid_map name in a raw line
+        self._value_pattern = None  # Finds guid_map names as whole JSON values
+        self.pacing_ms = PACING_MS
+
+        # One worker thread runs every test; Run Test just queues another run
+        self._task_queue = queue.Queue()
+        threading.Thread(target=self._worker, daemon=True).start()
+
+        # Log lines from the test thread, written to the widget in batches
+        self._log_queue = deque()
+        self.root.after(50, self._drain_log)
 
     def browse_file(self):
         filename = filedialog.askopenfilename(
@@ -43,65 +155,105 @@ class MCPTestHarnessGUI:
 
     def log(self, message):
         # --- Modified to handle updates from thread ---
-        def update_log():
-            self.log_text.insert(tk.END, message + "\n")
-            self.log_text.see(tk.END)
-
-        # Schedule the update in the main Tkinter thread
-        self.root.after(0, update_log)
+        # Queue the line; the main Tkinter thread drains the queue every
+        # 50 ms, so a long test doesn't cost a widget insert and redraw per line
+        self._log_queue.append(message + "\n")
         print(message)  # Also print to console
 
+    def _drain_log(self):
+        # deque appends and pops are thread-safe, so no lock is needed; only
+        # the lines queued so far are taken, the rest wait for the next drain
+        pending = self._log_queue
+        if pending:
+            text = "".join([pending.popleft() for _ in range(len(pending))])
+            self.log_text.insert(tk.END, text)
+            self.log_text.see(tk.END)
+        self.root.after(50, self._drain_log)
+
     def run_test_thread(self):
         # Disable run button during test
         self.run_button.config(state=tk.DISABLED)
         # Clear log and GUID map for new run
+        self._log_queue.clear()
         self.log_text.delete(1.0, tk.END)
         self.guid_map = {}
-        # Start the test in a separate thread
-        threading.Thread(target=self.run_test, daemon=True).start()
+        self._sub_pattern = None
+        self._value_pattern = None
+        # Tk variables are read here on the main thread, not in the test thread
+        self._verbose = self.verbose_var.get()
+        # Run the test on the worker thread
+        self._task_queue.put(self.run_test)
+
+    def _worker(self):
+        while True:
+            task = self._task_queue.get()
+            task()
+
+    # --- ADDED: Substitution of captured names ---
+    def update_sub_pattern(self):
+        """Recompiles the pattern that finds captured names in a raw line."""
+        # A line spelling a name with JSON escapes has a backslash in it, and
+        # run_test hands every such line to the walker instead
+        names = [re.escape(name.encode("utf-8")) for name in self.guid_map]
+        self._sub_pattern = re.compile(b"|".join(names)) if names else None
+
+        # When every name is plain, a value can be replaced in the JSON text
+        # itself: a quoted name after a ':', ',' or '[' and before a ',', ']'
+        # or '}' is a whole string value, never a key or part of a string
+        self._value_pattern = None
+        if self.guid_map and all(map(_PLAIN_NAME.fullmatch, self.guid_map)):
+            self._value_pattern = re.compile(
+                rb'([:,\[]\s*)"('
+                + b"|".join(re.escape(name.encode("utf-8")) for name in self.guid_map)
+                + rb')"(?=\s*[,\]}])'
+            )
+
+    def _substitute_match(self, match):
+        value = match.group(2).decode("utf-8")
+        if self._verbose:
+            self.log(f"    Substituted value: '{value}' -> '{self.guid_map[value]}'")
+        return match.group(1) + json.dumps(self.guid_map[value]).encode("utf-8")
 
-    # --- ADDED: Recursive substitution function ---
     def substitute_placeholders(self, data_structure):
-        """Recursively substitutes known names with GUIDs in dicts and lists."""
-        if isinstance(data_structure, dict):
-            new_dict = {}
-            for key, value in data_structure.items():
-                # Substitute the value if it's a string matching a known name
-                if isinstance(value, str) and value in self.guid_map:
-                    new_dict[key] = self.guid_map[value]
-                    self.log(
-                        f"    Substituted '{key}': '{value}' -> '{self.guid_map[value]}'"
-                    )
-                # Recursively process nested structures
-                elif isinstance(value, (dict, list)):
-                    new_dict[key] = self.substitute_placeholders(value)
-                else:
-                    new_dict[key] = value
-            return new_dict
-        elif isinstance(data_structure, list):
-            new_list = []
-            for item in data_structure:
-                # Substitute the item if it's a string matching a known name
-                if isinstance(item, str) and item in self.guid_map:
-                    new_list.append(self.guid_map[item])
-                    self.log(
-                        f"    Substituted item in list: '{item}' -> '{self.guid_map[item]}'"
-                    )
-                # Recursively process nested structures
-                elif isinstance(item, (dict, list)):
-                    new_list.append(self.substitute_placeholders(item))
-                else:
-                    new_list.append(item)
-            return new_list
-        else:
-            # If it's not a dict or list, check if the value itself needs substitution
-            if isinstance(data_structure, str) and data_structure in self.guid_map:
-                substituted_value = self.guid_map[data_structure]
-                self.log(
-                    f"    Substituted value: '{data_structure}' -> '{substituted_value}'"
-                )
-                return substituted_value
-            return data_structure  # Return other types unchanged
+        """Substitutes known names with GUIDs in dicts and lists, in place.
+
+        Walks the tree with an explicit stack instead of recursing, and only
+        writes to the containers where a value is replaced. Returns how many
+        values were substituted.
+        """
+        if not self.guid_map or not isinstance(data_structure, (dict, list)):
+            return 0
+
+        # Locals for the hot loop; substitutions are only logged when verbose
+        lookup = self.guid_map.get
+        log = self.log if self._verbose else None
+        substituted = 0
+        stack = deque([data_structure])
+        pop = stack.pop
+        push = stack.append
+        while stack:
+            container = pop()
+            in_dict = type(container) is dict
+            items = container.items() if in_dict else enumerate(container)
+            for key, value in items:
+                kind = type(value)
+                if kind is str:
+                    # Substitute the value if it's a string matching a known name
+                    guid = lookup(value)
+                    if guid is None:
+                        continue
+                    container[key] = guid
+                    substituted += 1
+                    if log is None:
+                        continue
+                    if in_dict:
+                        log(f"    Substituted '{key}': '{value}' -> '{guid}'")
+                    else:
+                        log(f"    Substituted item in list: '{value}' -> '{guid}'")
+                # Nested structures are visited later from the stack
+                elif kind is dict or kind is list:
+                    push(value)
+        return substituted
 
     def run_test(self):
         test_file = self.file_entry.get()
@@ -113,133 +265,108 @@ class MCPTestHarnessGUI:
         try:
             with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
                 self.log(f"Connecting to MCP server at {SERVER_HOST}:{SERVER_PORT}...")
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 << 20)
                 sock.connect((SERVER_HOST, SERVER_PORT))
+                # Generous timeout for responses (base64 previews can be large);
+                # set once for the whole connection
+                sock.settimeout(120.0)
                 self.log("Connected ✅\n--- Test Start ---")
+                # The buffered reader does the newline framing and keeps any
+                # bytes past a response for the next command
+                rfile = sock.makefile("rb", buffering=131072)
 
-                with open(test_file, "r", encoding="utf-8") as f:
-                    for line_num, line in enumerate(f, 1):
+                with open(test_file, "rb") as f:
+                    for line_num, line in enumerate(_mapped_lines(f), 1):
                         if not line.strip():
                             continue  # Skip empty lines
 
                         try:
                             # Load original command from file
-                            original_command = json.loads(line.strip())
+                            raw_line = line.strip()
+                            original_command = _loads(raw_line)
+                            # The line itself is the original command's JSON
                             self.log(
-                                f"\n▶️ Command {line_num} (Original): {json.dumps(original_command)}"
+                                f"\n▶️ Command {line_num} (Original): {raw_line.decode('utf-8')}"
                             )
 
                             # --- MODIFIED: Substitute placeholders before sending ---
-                            # Deep copy to avoid modifying the original dict before logging
-                            command_to_send = copy.deepcopy(original_command)
-                            command_to_send = self.substitute_placeholders(
-                                command_to_send
-                            )
-
-                            if command_to_send != original_command:
-                                self.log(
-                                    f"   Command {line_num} (Substituted): {json.dumps(command_to_send)}"
-                                )
+                            # Only look closer if a captured name occurs in the line,
+                            # or escapes could be hiding one; otherwise the line is
+                            # sent exactly as read
+                            command_to_send = original_command
+                            payload = raw_line
+                            escaped = b"\\" in raw_line
+                            if self._sub_pattern is not None and (
+                                escaped or self._sub_pattern.search(raw_line)
+                            ):
+                                if self._value_pattern is not None and not escaped:
+                                    # Plain names: substitute in the text and send it
+                                    # as is, without walking or re-serializing
+                                    substituted_line, count = self._value_pattern.subn(
+                                        self._substitute_match, raw_line
+                                    )
+                                    if count:
+                                        self.log(
+                                            f"   Command {line_num} (Substituted): {substituted_line.decode('utf-8')}"
+                                        )
+                                        payload = substituted_line
+                                # The freshly parsed command is free to be
+                                # substituted in place
+                                elif self.substitute_placeholders(command_to_send):
+                                    self.log(
+                                        f"   Command {line_num} (Substituted): {json.dumps(command_to_send)}"
+                                    )
+                                    payload = _encode(command_to_send)
 
                             # Send the potentially modified command
-                            sock.sendall(
-                                (json.dumps(command_to_send) + "\n").encode("utf-8")
-                            )
+                            _send_line(sock, payload)
 
-                            # Receive response (increase buffer size significantly for base64 previews)
-                            response_data = b""
-                            sock.settimeout(120.0)  # Set generous timeout for receiving
-                            while True:
-                                try:
-                                    chunk = sock.recv(32768)  # Read larger chunks
-                                    if not chunk:
-                                        # Connection closed prematurely?
-                                        if not response_data:
-                                            raise ConnectionAbortedError(
-                                                "Server closed connection unexpectedly before sending response."
-                                            )
-                                        break  # No more data
-                                    response_data += chunk
-                                    # Basic check for newline delimiter, might need refinement for large data
-                                    if b"\n" in chunk:
-                                        break
-                                except socket.timeout:
-                                    # Check if we received *any* data before timeout
-                                    if not response_data:
-                                        raise TimeoutError(
-                                            f"Timeout waiting for response to Command {line_num}"
-                                        )
-                                    else:
-                                        self.log(
-                                            f"    Warning: Socket timeout, but received partial data ({len(response_data)} bytes). Assuming complete."
-                                        )
-                                        break  # Process what we got
-                            sock.settimeout(None)  # Reset timeout
+                            # Receive response
+                            try:
+                                response_data = rfile.readline()
+                            except socket.timeout:
+                                raise TimeoutError(
+                                    f"Timeout waiting for response to Command {line_num}"
+                                )
+                            if not response_data:
+                                # Connection closed prematurely?
+                                raise ConnectionAbortedError(
+                                    "Server closed connection unexpectedly before sending response."
+                                )
+
+                            response_data = response_data.strip()
 
-                            # Decode and parse response
-                            response_text = response_data.decode("utf-8").strip()
-                            if not response_text:
+                            # Parse the response straight from the received bytes
+                            if not response_data:
                                 raise ValueError("Received empty response from server.")
 
-                            decoded_response = json.loads(response_text)
-
-                            # Log the response (truncate potentially huge base64 data)
-                            loggable_response = copy.deepcopy(decoded_response)
-                            if isinstance(loggable_response, dict):
-                                # Check common keys for base64 data and truncate
-                                for key in ["image_base64", "image_data"]:
-                                    if (
-                                        key in loggable_response
-                                        and isinstance(loggable_response[key], str)
-                                        and len(loggable_response[key]) > 100
-                                    ):
-                                        loggable_response[key] = (
-                                            loggable_response[key][:50]
-                                            + "... [truncated]"
-                                        )
-                                # Also check within nested 'render' dict for snapshot
-                                if "render" in loggable_response and isinstance(
-                                    loggable_response["render"], dict
-                                ):
-                                    for key in ["image_base64", "image_data"]:
-                                        render_dict = loggable_response["render"]
-                                        if (
-                                            key in render_dict
-                                            and isinstance(render_dict[key], str)
-                                            and len(render_dict[key]) > 100
-                                        ):
-                                            render_dict[key] = (
-                                                render_dict[key][:50]
-                                                + "... [truncated]"
-                                            )
+                            # Truncate potentially huge base64 data for the log
+                            response_data = _BASE64_FIELD.sub(
+                                _truncate_base64, response_data
+                            )
+                            decoded_response = _loads(response_data)
 
+                            # Log the response
+                            indent = 2 if self._verbose else None
                             self.log(
-                                f"✅ Response {line_num}: {json.dumps(loggable_response, indent=2)}"
+                                f"✅ Response {line_num}: {json.dumps(decoded_response, indent=indent)}"
                             )
 
                             # --- ADDED: Capture GUID from response ---
                             if isinstance(decoded_response, dict):
-                                # Check common patterns for created objects
-                                context_keys = [
-                                    "object",
-                                    "light",
-                                    "camera",
-                                    "material",
-                                    "cloner",
-                                    "effector",
-                                    "field",
-                                    "shape",
-                                    "group",
-                                ]
-                                for key in context_keys:
-                                    if key in decoded_response and isinstance(
-                                        decoded_response[key], dict
-                                    ):
-                                        obj_info = decoded_response[key]
+                                # Check common patterns for created objects, in one
+                                # pass over the response
+                                for key, value in decoded_response.items():
+                                    if key in _CONTEXT_KEYS and isinstance(value, dict):
+                                        obj_info = value
                                         req_name = obj_info.get("requested_name")
                                         guid = obj_info.get("guid")
                                         act_name = obj_info.get("actual_name")
                                         if req_name and guid:
-                                            self.guid_map[req_name] = guid
+                                            # Interned names are usually matched by identity
+                                            # when commands are substituted
+                                            self.guid_map[sys.intern(req_name)] = guid
                                             self.log(
                                                 f"    Captured GUID: '{req_name}' -> {guid} (Actual name: '{act_name}')"
                                             )
@@ -249,23 +376,26 @@ class MCPTestHarnessGUI:
                                                 and act_name != req_name
                                                 and act_name not in self.guid_map
                                             ):
-                                                self.guid_map[act_name] = guid
+                                                self.guid_map[sys.intern(act_name)] = guid
                                                 self.log(
                                                     f"    Mapped actual name: '{act_name}' -> {guid}"
                                                 )
+                                            self.update_sub_pattern()
                                         break  # Assume only one primary object context per response
 
-                            # Brief pause between commands
-                            time.sleep(0.1)
+                            # No pause needed: the next command is only sent once this
+                            # response (and any GUID it carries) has been read
+                            if self.pacing_ms:
+                                time.sleep(self.pacing_ms / 1000)
 
                         except json.JSONDecodeError as e:
                             self.log(f"❌ Error decoding JSON for line {line_num}: {e}")
-                            self.log(f"   Raw line: {line.strip()}")
+                            self.log(
+                                f"   Raw line: {line.strip().decode('utf-8', errors='replace')}"
+                            )
                             break  # Stop test on error
                         except Exception as cmd_e:
                             self.log(f"❌ Error processing command {line_num}: {cmd_e}")
-                            import traceback
-
                             self.log(traceback.format_exc())
                             break  # Stop test on error
 
@@ -286,8 +416,6 @@ class MCPTestHarnessGUI:
             messagebox.showerror("Connection Error", "Connection Timeout.")
         except Exception as e:
             self.log(f"❌ Unexpected Error: {str(e)}")
-            import traceback
-
             self.log(traceback.format_exc())
             messagebox.showerror("Error", f"An unexpected error occurred:\n{str(e)}")
         finally:
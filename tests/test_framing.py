@@ -0,0 +1,207 @@
+"""Tests for response framing between the MCP server and Cinema 4D."""
+
+import asyncio
+import unittest
+import socket
+import json
+import threading
+import time
+from unittest.mock import patch
+
+from cinema4d_mcp.server import send_to_c4d, send_batch_to_c4d, C4DConnection
+
+# Larger than the initial receive buffer, with characters that have to be
+# escaped, so every chunk boundary lands somewhere interesting
+RESPONSE = {
+    "result": "line 1\nline 2\n" + "x" * 100_000,
+    "objects": [{"name": "Würfel", "depth": i} for i in range(50)],
+}
+CHUNK_SIZES = (1, 7, 4096, 65537)
+
+
+class TestFraming(unittest.IsolatedAsyncioTestCase):
+    """Feed responses to send_to_c4d in fragments over a socket pair."""
+
+    async def asyncSetUp(self):
+        self.client_sock, self.c4d_sock = socket.socketpair()
+        self.client_sock.setblocking(False)
+        self.connection = C4DConnection(sock=self.client_sock, connected=True)
+
+    async def asyncTearDown(self):
+        self.client_sock.close()
+        self.c4d_sock.close()
+
+    def reply(self, responses, chunk_size):
+        """Read one command per response, then answer them all with their
+        ids, written back in chunk_size pieces."""
+
+        def run():
+            reader = self.c4d_sock.makefile("rb")
+            ids = [json.loads(reader.readline())["id"] for _ in responses]
+            data = b"".join(
+                json.dumps({"id": command_id, **response}).encode("utf-8") + b"\n"
+                for command_id, response in zip(ids, responses)
+            )
+            for start in range(0, len(data), chunk_size):
+                self.c4d_sock.sendall(data[start : start + chunk_size])
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    async def test_fragmented_response(self):
+        """Test that a response is reassembled however it is split."""
+        for chunk_size in CHUNK_SIZES:
+            with self.subTest(chunk_size=chunk_size):
+                thread = self.reply([RESPONSE], chunk_size)
+                result = await send_to_c4d(self.connection, {"command": "test"})
+                thread.join()
+                self.assertEqual(result, RESPONSE)
+                self.assertTrue(self.connection.connected)
+
+    async def test_batch_responses_share_chunks(self):
+        """Test that responses arriving in the same chunk are both returned."""
+        responses = [{"index": i, "pad": "y" * (i * 500)} for i in range(20)]
+        for chunk_size in CHUNK_SIZES:
+            with self.subTest(chunk_size=chunk_size):
+                thread = self.reply(responses, chunk_size)
+                result = await send_batch_to_c4d(
+                    self.connection, [{"command": "test"}] * len(responses)
+                )
+                thread.join()
+                self.assertEqual(result, responses)
+                self.assertTrue(self.connection.connected)
+
+    async def test_batch_deadline_covers_earlier_commands(self):
+        """Test that a batch command's deadline counts from the send."""
+
+        def run():
+            reader = self.c4d_sock.makefile("rb")
+            ids = [json.loads(reader.readline())["id"] for _ in range(2)]
+            self.c4d_sock.sendall(b'{"id": %d, "result": "ok"}\n' % ids[0])
+            # Later than one timeout after the first answer, but within the
+            # time both commands are allowed from the send
+            time.sleep(0.45)
+            self.c4d_sock.sendall(b'{"id": %d, "result": "ok"}\n' % ids[1])
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        with patch("cinema4d_mcp.server._command_timeout", return_value=0.3):
+            result = await send_batch_to_c4d(self.connection, [{"command": "test"}] * 2)
+        thread.join()
+        self.assertEqual(result, [{"result": "ok"}] * 2)
+
+    async def test_responses_routed_by_id(self):
+        """Test that concurrent commands get their own responses in any order."""
+
+        def run():
+            reader = self.c4d_sock.makefile("rb")
+            commands = [json.loads(reader.readline()) for _ in range(3)]
+            # A stale id first, then the real answers in reverse order
+            self.c4d_sock.sendall(b'{"id": 999, "late": true}\n')
+            for command in reversed(commands):
+                response = {"id": command["id"], "echo": command["command"]}
+                self.c4d_sock.sendall(json.dumps(response).encode("utf-8") + b"\n")
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        results = await asyncio.gather(
+            *(send_to_c4d(self.connection, {"command": name}) for name in "abc")
+        )
+        thread.join()
+        self.assertEqual(results, [{"echo": name} for name in "abc"])
+        self.assertTrue(self.connection.connected)
+
+    async def test_malformed_commands_not_sent(self):
+        """Test that empty, non-dict and nameless commands get their own error."""
+        commands = [{}, "add_primitive", {"type": "cube"}, {"command": "test"}]
+        thread = self.reply([{"result": "ok"}], 4096)
+        result = await send_batch_to_c4d(self.connection, commands)
+        thread.join()
+
+        self.assertEqual(len(result), len(commands))
+        for response in result[:3]:
+            self.assertIn("Invalid command", response["error"])
+        self.assertEqual(result[3], {"result": "ok"})
+        # Only the valid command was written
+        self.c4d_sock.setblocking(False)
+        with self.assertRaises(BlockingIOError):
+            self.c4d_sock.recv(1)
+
+    async def test_caller_id_dropped(self):
+        """Test that a caller's "id" can't steal another command's response."""
+        sent = []
+
+        def run():
+            reader = self.c4d_sock.makefile("rb")
+            for _ in range(2):
+                command = json.loads(reader.readline())
+                sent.append(command)
+                response = {"id": command["id"], "echo": command["command"]}
+                self.c4d_sock.sendall(json.dumps(response).encode("utf-8") + b"\n")
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        results = await asyncio.gather(
+            send_to_c4d(self.connection, {"command": "a"}),
+            send_to_c4d(self.connection, {"command": "b", "id": 1}),
+        )
+        thread.join()
+        self.assertEqual(results, [{"echo": "a"}, {"echo": "b"}])
+        self.assertEqual([command["id"] for command in sent], [1, 2])
+
+    async def test_unmatched_response_fails_pending(self):
+        """Test that a response without a usable id fails every waiting command."""
+        frames = {
+            "no id": (b'{"result": "ok"}\n', "without a command id"),
+            "not JSON": (b"<html>\n", "Invalid response"),
+        }
+        for name, (frame, error) in frames.items():
+            with self.subTest(name):
+
+                def run():
+                    reader = self.c4d_sock.makefile("rb")
+                    reader.readline()
+                    reader.readline()
+                    self.c4d_sock.sendall(frame)
+
+                thread = threading.Thread(target=run, daemon=True)
+                thread.start()
+                results = await asyncio.gather(
+                    send_to_c4d(self.connection, {"command": "a"}),
+                    send_to_c4d(self.connection, {"command": "b"}),
+                )
+                thread.join()
+                for result in results:
+                    self.assertIn(error, result["error"])
+                self.assertTrue(self.connection.connected)
+
+    async def test_response_without_id_single_command(self):
+        """Test that an older plugin's reply still answers a lone command."""
+
+        def run():
+            self.c4d_sock.makefile("rb").readline()
+            self.c4d_sock.sendall(b'{"result": "ok"}\n')
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        result = await send_to_c4d(self.connection, {"command": "test"})
+        thread.join()
+        self.assertEqual(result, {"result": "ok"})
+
+    async def test_closed_before_response(self):
+        """Test that a connection closed before any response is reported."""
+
+        def run():
+            self.c4d_sock.makefile("rb").readline()
+            self.c4d_sock.shutdown(socket.SHUT_WR)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        result = await send_to_c4d(self.connection, {"command": "test"})
+        thread.join()
+        self.assertIn("Connection closed", result["error"])
+        self.assertFalse(self.connection.connected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""Tests that the plugin's typed fast paths accept the server's commands."""
+
+import asyncio
+import sys
+import unittest
+import importlib.machinery
+import importlib.util
+from contextlib import asynccontextmanager
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from cinema4d_mcp import server
+from cinema4d_mcp.server import C4DConnection, _frame_with_id
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+PLUGIN_PATH = Path(__file__).parent.parent / "c4d_plugin" / "mcp_server_plugin.pyp"
+
+
+def load_plugin():
+    """Import the plugin with a stand-in for Cinema 4D's c4d module."""
+    c4d = MagicMock()
+    c4d.GetC4DVersion.return_value = 2025000
+    with patch.dict(sys.modules, {"c4d": c4d, "c4d.gui": c4d.gui}):
+        loader = importlib.machinery.SourceFileLoader(
+            "mcp_server_plugin", str(PLUGIN_PATH)
+        )
+        spec = importlib.util.spec_from_loader(loader.name, loader)
+        plugin = importlib.util.module_from_spec(spec)
+        loader.exec_module(plugin)
+    return plugin
+
+
+async def sent_command(tool, **arguments):
+    """Run a tool against a fake connection and return the command it sent."""
+
+    @asynccontextmanager
+    async def connected():
+        yield C4DConnection(connected=True)
+
+    send = AsyncMock(return_value={})
+    with patch.object(server, "c4d_connection_context", connected), patch.object(
+        server, "send_to_c4d", send
+    ):
+        await tool(**arguments)
+    return send.call_args.args[1]
+
+
+@unittest.skipIf(msgspec is None, "msgspec is not installed")
+class TestTypedCommands(unittest.TestCase):
+    """Decode the frames the server's tools actually send."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.plugin = load_plugin()
+
+    def decode(self, command):
+        frame = _frame_with_id(command, 1)
+        return self.plugin._decode_message(frame.rstrip(b"\n"))
+
+    def test_set_keyframe(self):
+        """Test that set_keyframe takes the typed path with its property_name."""
+        command = asyncio.run(
+            sent_command(
+                server.set_keyframe,
+                object_name="Cube",
+                property_name="position.x",
+                value=10,
+                frame=5,
+                ctx=None,
+            )
+        )
+        decoded = self.decode(command)
+        self.assertIs(type(decoded), self.plugin._SetKeyframeCommand)
+        self.assertEqual(decoded.get("property_name"), "position.x")
+        self.assertEqual(decoded.get("id"), 1)
+
+    def test_add_primitive(self):
+        """Test that add_primitive takes the typed path."""
+        command = asyncio.run(
+            sent_command(
+                server.add_primitive,
+                primitive_type="cube",
+                name="Box",
+                position=[0, 1, 2],
+                size=[1, 1, 1],
+            )
+        )
+        self.assertIs(type(self.decode(command)), self.plugin._AddPrimitiveCommand)
+
+    def test_modify_object(self):
+        """Test that modify_object takes the typed path."""
+        command = asyncio.run(
+            sent_command(
+                server.modify_object,
+                object_name="Box",
+                properties={"position": [1, 2, 3]},
+                ctx=None,
+            )
+        )
+        self.assertIs(type(self.decode(command)), self.plugin._ModifyObjectCommand)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,52 +1,107 @@
 """Tests for the Cinema 4D MCP Server."""
 
+import asyncio
 import unittest
 import socket
 import json
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 
 from cinema4d_mcp.server import send_to_c4d, C4DConnection
 
-class TestC4DServer(unittest.TestCase):
+class TestC4DServer(unittest.IsolatedAsyncioTestCase):
     """Test cases for Cinema 4D server functionality."""
 
-    def test_connection_disconnected(self):
+    async def asyncSetUp(self):
+        # A connected socket pair stands in for Cinema 4D
+        self.client_sock, self.c4d_sock = socket.socketpair()
+        self.client_sock.setblocking(False)
+
+    async def asyncTearDown(self):
+        self.client_sock.close()
+        self.c4d_sock.close()
+
+    async def test_connection_disconnected(self):
         """Test behavior when connection is disconnected."""
         connection = C4DConnection(sock=None, connected=False)
-        result = send_to_c4d(connection, {"command": "test"})
+        result = await send_to_c4d(connection, {"command": "test"})
         self.assertIn("error", result)
         self.assertEqual(result["error"], "Not connected to Cinema 4D")
 
-    @patch('socket.socket')
-    def test_send_to_c4d(self, mock_socket):
-        """Test sending commands to C4D with a mocked socket."""
-        # Setup mock
-        mock_instance = MagicMock()
-        mock_instance.recv.return_value = b'{"result": "success"}\n'
-        mock_socket.return_value = mock_instance
-        
-        # Create connection with mock socket
-        connection = C4DConnection(sock=mock_instance, connected=True)
-        
+    async def test_send_to_c4d(self):
+        """Test sending commands to C4D over a socket pair."""
+        # The first command on a connection gets id 1
+        self.c4d_sock.sendall(b'{"id": 1, "result": "success"}\n')
+
+        # Create connection with the client end
+        connection = C4DConnection(sock=self.client_sock, connected=True)
+
         # Test sending a command
-        result = send_to_c4d(connection, {"command": "test"})
-        
+        result = await send_to_c4d(connection, {"command": "test"})
+
         # Verify command was sent correctly
-        expected_send = b'{"command": "test"}\n'
-        mock_instance.sendall.assert_called_once()
+        sent = self.c4d_sock.recv(1024)
+        self.assertTrue(sent.endswith(b"\n"))
+        self.assertEqual(json.loads(sent), {"id": 1, "command": "test"})
         self.assertEqual(result, {"result": "success"})
 
-    def test_send_to_c4d_exception(self):
+    async def test_send_to_c4d_reuses_buffer(self):
+        """Test that consecutive commands share the connection's receive buffer."""
+        buf = bytearray(65536)
+        connection = C4DConnection(sock=self.client_sock, connected=True, recv_buf=buf)
+
+        for index in range(2):
+            self.c4d_sock.sendall(b'{"id": %d, "index": %d}\n' % (index + 1, index))
+            result = await send_to_c4d(connection, {"command": "test"})
+            self.assertEqual(result, {"index": index})
+            self.assertIs(connection.recv_buf, buf)
+
+    async def test_send_to_c4d_exception(self):
         """Test error handling when sending fails."""
-        # Create a socket that raises an exception
-        mock_socket = MagicMock()
-        mock_socket.sendall.side_effect = Exception("Test error")
-        
-        connection = C4DConnection(sock=mock_socket, connected=True)
-        result = send_to_c4d(connection, {"command": "test"})
-        
+        # Make the send raise an exception
+        loop = asyncio.get_running_loop()
+        connection = C4DConnection(sock=self.client_sock, connected=True)
+        with patch.object(
+            loop, "sock_sendall", side_effect=BrokenPipeError("Test error")
+        ):
+            result = await send_to_c4d(connection, {"command": "test"})
+
         self.assertIn("error", result)
         self.assertIn("Test error", result["error"])
+        self.assertFalse(connection.connected)
+
+    async def test_send_cancelled(self):
+        """Test that a send cut short by cancellation ends the connection."""
+        loop = asyncio.get_running_loop()
+        connection = C4DConnection(sock=self.client_sock, connected=True)
+        with patch.object(loop, "sock_sendall", side_effect=asyncio.CancelledError):
+            with self.assertRaises(asyncio.CancelledError):
+                await send_to_c4d(connection, {"command": "test"})
+
+        self.assertFalse(connection.connected)
+        self.assertEqual(connection.pending, {})
+
+    async def test_error_does_not_reopen_socket(self):
+        """Test that a non-socket error keeps the same connection usable."""
+        loop = asyncio.get_running_loop()
+        connection = C4DConnection(sock=self.client_sock, connected=True)
+        sock = connection.sock
+
+        with patch("cinema4d_mcp.server.socket.socket") as mock_socket, patch.object(
+            loop, "sock_connect"
+        ) as mock_connect:
+            with patch.object(loop, "sock_sendall", side_effect=Exception("Test error")):
+                result = await send_to_c4d(connection, {"command": "test"})
+            self.assertIn("Test error", result["error"])
+            self.assertTrue(connection.connected)
+
+            # The failed command used id 1
+            self.c4d_sock.sendall(b'{"id": 2, "result": "success"}\n')
+            result = await send_to_c4d(connection, {"command": "test"})
+
+        self.assertEqual(result, {"result": "success"})
+        self.assertEqual(mock_socket.call_count, 0)
+        self.assertEqual(mock_connect.call_count, 0)
+        self.assertIs(connection.sock, sock)
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()